@@ -1,3 +1,5 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
 from src.visualization.server import create_server
 from src.simulation_runner import run_simulation_batch, analyze_results, plot_results
 
@@ -11,12 +13,20 @@ if __name__ == "__main__":
 
     # The simulation batch analysis can run in parallel
     print("Running simulations...")
-    # Single agent simulations
-    single_agent_results = run_simulation_batch(n_agents=1)
+    # Single and multiple agent batches run side by side, each with half
+    # of the CPUs for its own worker pool
+    processes = max(1, (os.cpu_count() or 1) // 2)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        single_future = executor.submit(
+            run_simulation_batch, n_agents=1, processes=processes
+        )
+        multi_future = executor.submit(
+            run_simulation_batch, n_agents=3, processes=processes
+        )
+        single_agent_results = single_future.result()
+        multi_agent_results = multi_future.result()
+
     single_analysis = analyze_results(single_agent_results)
-    
-    # Multiple agent simulations
-    multi_agent_results = run_simulation_batch(n_agents=3)
     multi_analysis = analyze_results(multi_agent_results)
     
     # Show comparative results
@@ -0,0 +1,148 @@
+import numpy as np
+from numba import njit
+from src.agents.cell import OBSTACLE
+
+# 4-connected neighbour offsets, shared by every grid kernel and the Roomba
+DX = (0, 0, 1, -1)
+DY = (1, -1, 0, 0)
+
+# Distance for cells that can't reach the goal
+UNREACHABLE = np.iinfo(np.int32).max
+
+
+@njit(cache=True)
+def _heap_push(heap_f, heap_i, size, f, idx):
+    """Push (f, idx) onto the array-backed binary min-heap"""
+    pos = size
+    heap_f[pos] = f
+    heap_i[pos] = idx
+    while pos > 0:
+        parent = (pos - 1) // 2
+        if heap_f[parent] <= heap_f[pos]:
+            break
+        heap_f[parent], heap_f[pos] = heap_f[pos], heap_f[parent]
+        heap_i[parent], heap_i[pos] = heap_i[pos], heap_i[parent]
+        pos = parent
+    return size + 1
+
+
+@njit(cache=True)
+def _heap_pop(heap_f, heap_i, size):
+    """Pop the index with the lowest f score from the heap"""
+    top = heap_i[0]
+    size -= 1
+    heap_f[0] = heap_f[size]
+    heap_i[0] = heap_i[size]
+    pos = 0
+    while True:
+        child = 2 * pos + 1
+        if child >= size:
+            break
+        if child + 1 < size and heap_f[child + 1] < heap_f[child]:
+            child += 1
+        if heap_f[pos] <= heap_f[child]:
+            break
+        heap_f[child], heap_f[pos] = heap_f[pos], heap_f[child]
+        heap_i[child], heap_i[pos] = heap_i[pos], heap_i[child]
+        pos = child
+    return top, size
+
+
+@njit(cache=True)
+def astar_next(state_grid, sx, sy, gx, gy):
+    """
+    A* over a 4-connected cell state grid, treating OBSTACLE cells as blocked.
+    Returns (next_x, next_y, path_length), or (-1, -1, -1) if the goal
+    can't be reached.
+    """
+    w, h = state_grid.shape
+    if sx == gx and sy == gy:
+        return sx, sy, 0
+    if state_grid[gx, gy] == OBSTACLE:
+        return -1, -1, -1
+
+    n = w * h
+    start = sx * h + sy
+    goal = gx * h + gy
+    g_score = np.full(n, -1, np.int32)
+    parent = np.full(n, -1, np.int32)
+    closed = np.zeros(n, np.uint8)
+    # Stale entries are left in the heap, so size it for every relaxation
+    heap_f = np.empty(4 * n + 1, np.int32)
+    heap_i = np.empty(4 * n + 1, np.int32)
+
+    g_score[start] = 0
+    size = _heap_push(heap_f, heap_i, 0, abs(sx - gx) + abs(sy - gy), start)
+
+    while size > 0:
+        current, size = _heap_pop(heap_f, heap_i, size)
+        if closed[current]:
+            continue
+        if current == goal:
+            break
+        closed[current] = 1
+
+        cx = current // h
+        cy = current % h
+        for k in range(4):
+            nx = cx + DX[k]
+            ny = cy + DY[k]
+            if nx < 0 or ny < 0 or nx >= w or ny >= h:
+                continue
+            if state_grid[nx, ny] == OBSTACLE:
+                continue
+            nxt = nx * h + ny
+            if closed[nxt]:
+                continue
+            tentative_g_score = g_score[current] + 1
+            if g_score[nxt] == -1 or tentative_g_score < g_score[nxt]:
+                g_score[nxt] = tentative_g_score
+                parent[nxt] = current
+                size = _heap_push(
+                    heap_f,
+                    heap_i,
+                    size,
+                    tentative_g_score + abs(nx - gx) + abs(ny - gy),
+                    nxt,
+                )
+
+    if g_score[goal] == -1:
+        return -1, -1, -1
+
+    # Walk back from the goal to the first step out of the start cell
+    node = goal
+    while parent[node] != start:
+        node = parent[node]
+    return node // h, node % h, g_score[goal]
+
+
+@njit(cache=True)
+def distance_field(state_grid, gx, gy):
+    """
+    Breadth-first path lengths from every cell to (gx, gy) over a 4-connected
+    cell state grid. Obstacles and cut-off cells are set to UNREACHABLE.
+    """
+    w, h = state_grid.shape
+    dist = np.full((w, h), UNREACHABLE, np.int32)
+    queue = np.empty(w * h, np.int32)
+    dist[gx, gy] = 0
+    queue[0] = gx * h + gy
+    head = 0
+    tail = 1
+
+    while head < tail:
+        current = queue[head]
+        head += 1
+        cx = current // h
+        cy = current % h
+        for k in range(4):
+            nx = cx + DX[k]
+            ny = cy + DY[k]
+            if nx < 0 or ny < 0 or nx >= w or ny >= h:
+                continue
+            if state_grid[nx, ny] == OBSTACLE or dist[nx, ny] != UNREACHABLE:
+                continue
+            dist[nx, ny] = dist[cx, cy] + 1
+            queue[tail] = nx * h + ny
+            tail += 1
+    return dist
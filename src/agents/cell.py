@@ -1,12 +1,19 @@
 from mesa import Agent
 
+# Cell states, mirrored in RoomModel.state_grid
+CLEAN = 0
+DIRTY = 1
+OBSTACLE = 2
+CHARGING_STATION = 3
+
+
 class Cell(Agent):
     """A cell in the grid that can be in different states"""
     
-    def __init__(self, unique_id, model, state="clean"):
+    def __init__(self, unique_id, model, state=CLEAN):
         """
         Create a new cell
-        States: "clean", "dirty", "obstacle", "charging_station"
+        States: CLEAN, DIRTY, OBSTACLE, CHARGING_STATION
         """
         super().__init__(unique_id, model)
         self.state = state
@@ -15,5 +22,8 @@ class Cell(Agent):
         return self.state
     
     def set_state(self, new_state):
-        if new_state in ["clean", "dirty", "obstacle", "charging_station"]:
+        if new_state in (CLEAN, DIRTY, OBSTACLE, CHARGING_STATION):
+            self.model.state_counts[self.state] -= 1
+            self.model.state_counts[new_state] += 1
             self.state = new_state
+            self.model.state_grid[self.pos] = new_state
@@ -0,0 +1,54 @@
+from numba import njit
+from src.agents.astar_numba import DX, DY
+from src.agents.cell import DIRTY
+
+
+@njit(cache=True)
+def observe(
+    state_grid, state_knowledge, knowledge, dirty_memory, visited, explored, x, y
+):
+    """
+    Record the cell at (x, y) and its 4 neighbours in the knowledge matrix,
+    mapping each cell state through state_knowledge. Dirty cells are marked
+    in dirty_memory; the current cell is unmarked once it's no longer dirty.
+    The current cell is marked visited and its neighbours explored.
+    Returns how many cells were newly marked explored.
+    """
+    w, h = state_grid.shape
+    state = state_grid[x, y]
+    knowledge[x, y] = state_knowledge[state]
+    dirty_memory[x, y] = state == DIRTY
+    visited[x, y] = 1
+
+    newly_explored = 0
+    for k in range(4):
+        nx = x + DX[k]
+        ny = y + DY[k]
+        if nx < 0 or ny < 0 or nx >= w or ny >= h:
+            continue
+        if not explored[nx, ny]:
+            explored[nx, ny] = 1
+            newly_explored += 1
+        state = state_grid[nx, ny]
+        knowledge[nx, ny] = state_knowledge[state]
+        if state == DIRTY:
+            dirty_memory[nx, ny] = 1
+    return newly_explored
+
+
+@njit(cache=True)
+def nearest_marked(mask, x, y):
+    """Closest non-zero cell of mask to (x, y) by Manhattan distance, or (-1, -1)"""
+    w, h = mask.shape
+    best_x = -1
+    best_y = -1
+    best = w + h
+    for i in range(w):
+        for j in range(h):
+            if mask[i, j]:
+                distance = abs(i - x) + abs(j - y)
+                if distance < best:
+                    best = distance
+                    best_x = i
+                    best_y = j
+    return best_x, best_y
@@ -0,0 +1,34 @@
+from numba import njit
+
+
+@njit(cache=True)
+def compute_metrics(
+    clean_count, cleaned_count, batteries, movements, explored_counts, total_cells
+):
+    """
+    Per-step simulation metrics from the model's counters and per-Roomba arrays.
+    Returns (clean %, total movements, average battery, explored %, cleaned %,
+    cleaning efficiency, battery efficiency), in TIME_SERIES_KEYS order.
+    """
+    total_movements = movements.sum()
+    avg_battery = batteries.mean()
+    clean_percentage = clean_count / total_cells * 100
+    explored_percentage = explored_counts.sum() / total_cells * 100
+    cleaned_percentage = cleaned_count / total_cells * 100
+
+    # Guard against dividing by zero before anything has moved or drained
+    battery_used = 100 * batteries.size - batteries.sum()
+    moves_denom = total_movements if total_movements > 0 else 1
+    battery_denom = battery_used if battery_used > 0 else 1
+    cleaning_efficiency = cleaned_count / moves_denom * 100
+    battery_efficiency = cleaned_count / battery_denom * 100
+
+    return (
+        clean_percentage,
+        total_movements,
+        avg_battery,
+        explored_percentage,
+        cleaned_percentage,
+        cleaning_efficiency,
+        battery_efficiency,
+    )
@@ -1,10 +1,60 @@
 from mesa import Model
 from mesa.space import MultiGrid
-from mesa.time import RandomActivation
+from mesa.time import BaseScheduler, RandomActivation
 from mesa.datacollection import DataCollector
-from src.agents.cell import Cell
-from src.agents.roomba import Roomba
-import random
+from src.agents.cell import Cell, CLEAN, DIRTY, OBSTACLE, CHARGING_STATION
+from src.agents.roomba import Roomba, DIRS
+from src.agents.astar_numba import distance_field
+import numpy as np
+
+
+# DataCollector reporters live at module level so models stay picklable
+def _clean_pct(m):
+    return m.state_counts[CLEAN] / m.total_cells * 100
+
+
+def _total_moves(m):
+    return sum(roomba.movements for roomba in m.roombas)
+
+
+def _time_steps(m):
+    return m.current_time
+
+
+def _average_battery(m):
+    if not m.roombas:
+        return 0
+    return sum(roomba.battery for roomba in m.roombas) / len(m.roombas)
+
+
+def _explored_pct(m):
+    explored = sum(roomba.explored_count for roomba in m.roombas)
+    return explored / m.total_cells * 100
+
+
+def _cleaned_pct(m):
+    return (m.clean_cells_count / m.total_cells) * 100
+
+
+def _cleaning_efficiency(m):
+    if not m.roombas:
+        return 0
+    return (m.clean_cells_count / max(_total_moves(m), 1)) * 100
+
+
+def _battery_efficiency(m):
+    if not m.roombas:
+        return 0
+    battery_used = sum(100 - roomba.battery for roomba in m.roombas)
+    return (m.clean_cells_count / max(battery_used, 1)) * 100
+
+
+def _battery(a):
+    return a.battery
+
+
+def _moves(a):
+    return a.movements
 
 
 class RoomModel(Model):
@@ -18,7 +68,9 @@ class RoomModel(Model):
         obstacle_percent=0.2,
         n_agents=1,
         max_time=1000,
+        seed=None,
     ):
+        # seed is picked up by mesa's Model.__new__ to seed self.random
         super().__init__()
         self.width = width
         self.height = height
@@ -26,6 +78,7 @@ class RoomModel(Model):
         self.obstacle_percent = obstacle_percent
         self.n_agents = n_agents
         self.max_time = max_time
+        self.total_cells = width * height
         self.current_time = 0
         self.running = True
 
@@ -34,63 +87,33 @@ class RoomModel(Model):
         self.initial_dirty_cells = 0
 
         self.grid = MultiGrid(width, height, False)
-        self.schedule = RandomActivation(self)
-
-        self.datacollector = DataCollector(
-            model_reporters={
-                "Clean_Percentage": lambda m: (
-                    sum(
-                        1
-                        for x in range(m.width)
-                        for y in range(m.height)
-                        if m.grid.get_cell_list_contents([(x, y)])[0].state == "clean"
-                    )
-                    / (m.width * m.height)
-                    * 100
-                ),
-                "Total_Movements": lambda m: sum(
-                    roomba.movements for roomba in m.roombas
-                ),
-                "Time_Steps": lambda m: m.current_time,
-            },
-            agent_reporters={
-                "Battery": lambda a: a.battery if isinstance(a, Roomba) else None,
-                "Movements": lambda a: a.movements if isinstance(a, Roomba) else None,
-            },
+        # Cell states by (x, y), kept in sync by Cell.set_state
+        self.state_grid = np.zeros((width, height), dtype=np.int8)
+        # Direct Cell references, indexed by (x, y)
+        self.cells = np.empty((width, height), dtype=object)
+        # Open neighbouring cells by position, filled in lazily
+        self._open_neighbours = {}
+        # Number of cells in each state, indexed by state
+        self.state_counts = [0, 0, 0, 0]
+        # A lone Roomba has no activation order to shuffle
+        self.schedule = (
+            BaseScheduler(self) if n_agents == 1 else RandomActivation(self)
         )
+
         self.datacollector = DataCollector(
             model_reporters={
-                "Clean_Percentage": lambda m: (
-                    sum(1 for x in range(m.width) for y in range(m.height)
-                        if m.grid.get_cell_list_contents([(x, y)])[0].state == "clean")
-                    / (m.width * m.height) * 100
-                ),
-                "Total_Movements": lambda m: sum(
-                    roomba.movements for roomba in m.roombas
-                ),
-                "Average_Battery": lambda m: (
-                    sum(roomba.battery for roomba in m.roombas) / len(m.roombas)
-                    if m.roombas else 0
-                ),
-                "Explored_Cells_Percentage": lambda m: (
-                    sum(len(roomba.explored_cells) for roomba in m.roombas) 
-                    / (m.width * m.height) * 100
-                ),
-                "Cleaned_Cells_Percentage": lambda m: (
-                    (m.clean_cells_count / (m.width * m.height)) * 100
-                ),
-                "Cleaning_Efficiency": lambda m: (
-                    (m.clean_cells_count / max(sum(roomba.movements for roomba in m.roombas), 1)) * 100
-                    if m.roombas else 0
-                ),
-                "Battery_Efficiency": lambda m: (
-                    (m.clean_cells_count / max(sum(100 - roomba.battery for roomba in m.roombas), 1)) * 100
-                    if m.roombas else 0
-                ),
+                "Clean_Percentage": _clean_pct,
+                "Total_Movements": _total_moves,
+                "Time_Steps": _time_steps,
+                "Average_Battery": _average_battery,
+                "Explored_Cells_Percentage": _explored_pct,
+                "Cleaned_Cells_Percentage": _cleaned_pct,
+                "Cleaning_Efficiency": _cleaning_efficiency,
+                "Battery_Efficiency": _battery_efficiency,
             },
             agent_reporters={
-                "Battery": lambda a: a.battery if isinstance(a, Roomba) else None,
-                "Movements": lambda a: a.movements if isinstance(a, Roomba) else None,
+                "Battery": _battery,
+                "Movements": _moves,
             },
         )
 
@@ -99,61 +122,52 @@ class RoomModel(Model):
 
     def init_grid(self):
         """Initialize the grid with cells"""
-        cell_id = 0
-        for x in range(self.width):
-            for y in range(self.height):
-                cell = Cell(cell_id, self, "clean")
-                self.grid.place_agent(cell, (x, y))
-                self.schedule.add(cell)
-                cell_id += 1
+        # Calculate available cells (as flat x * height + y indices)
+        total_cells = self.total_cells
 
-        # Add charging station at (1,1) for single agent mode
+        # Reserve charging station position for single agent
+        charger_idx = 1 * self.height + 1
         if self.n_agents == 1:
-            cell = self.grid.get_cell_list_contents([(1, 1)])[0]
-            cell.set_state("charging_station")
+            total_cells -= 1
 
-        # Count initial clean cells
-        self.clean_cells_count = self.width * self.height
+        # Calculate number of dirty and obstacle cells
+        dirty_cells = min(int(total_cells * self.dirty_percent), total_cells)
+        obstacle_cells = min(
+            int(total_cells * self.obstacle_percent), total_cells - dirty_cells
+        )
 
-        # Calculate available positions and cells
-        total_cells = self.width * self.height
-        positions = [(x, y) for x in range(self.width) for y in range(self.height)]
+        # Draw dirty and obstacle positions in one go and write their states
+        # straight into the state grid, dirty cells first. With a reserved
+        # charger the draw skips its index by shifting everything past it.
+        picks = np.array(
+            self.random.sample(range(total_cells), dirty_cells + obstacle_cells),
+            dtype=np.intp,
+        )
+        if self.n_agents == 1:
+            picks[picks >= charger_idx] += 1
+        flat_states = self.state_grid.reshape(-1)
+        flat_states[picks[:dirty_cells]] = DIRTY
+        flat_states[picks[dirty_cells:]] = OBSTACLE
 
-        # Reserve charging station position for single agent
+        # Add charging station at (1,1) for single agent mode
         if self.n_agents == 1:
-            positions.remove((1, 1))
-            total_cells -= 1  
+            self.state_grid[1, 1] = CHARGING_STATION
 
-        # Calculate number of dirty and obstacle cells
-        dirty_cells = min(int(total_cells * self.dirty_percent), len(positions))
-
-        # Place dirty cells
-        if dirty_cells > 0:
-            dirty_positions = random.sample(positions, dirty_cells)
-            for pos in dirty_positions:
-                cell = self.grid.get_cell_list_contents([pos])[0]
-                cell.set_state("dirty")
-                self.clean_cells_count -= 1
-                positions.remove(pos)  
-
-            self.initial_dirty_cells = dirty_cells
-
-        # Calculate and place obstacles in remaining positions
-        remaining_cells = len(positions)
-        obstacle_cells = min(int(total_cells * self.obstacle_percent), remaining_cells)
-
-        if obstacle_cells > 0:
-            # Filter positions that are still clean
-            clean_positions = [
-                pos
-                for pos in positions
-                if self.grid.get_cell_list_contents([pos])[0].state == "clean"
-            ]
-            # Place obstacles
-            for pos in random.sample(clean_positions, obstacle_cells):
-                cell = self.grid.get_cell_list_contents([pos])[0]
-                cell.set_state("obstacle")
-                self.clean_cells_count -= 1
+        # Create every cell with its final state in a single pass
+        cell_id = 0
+        for x in range(self.width):
+            for y in range(self.height):
+                cell = Cell(cell_id, self, int(self.state_grid[x, y]))
+                self.grid.place_agent(cell, (x, y))
+                # Cells never act, so they stay out of the schedule
+                self.cells[x, y] = cell
+                cell_id += 1
+
+        self.state_counts = np.bincount(
+            self.state_grid.ravel(), minlength=len(self.state_counts)
+        ).tolist()
+        self.clean_cells_count = self.total_cells - dirty_cells - obstacle_cells
+        self.initial_dirty_cells = dirty_cells
 
     def init_roombas(self):
         """Initialize multiple Roombas with charging stations"""
@@ -163,26 +177,21 @@ class RoomModel(Model):
             # Single agent starts at (1,1)
             initial_pos = (1, 1)
             # Ensure cell is a charging station
-            cell = self.grid.get_cell_list_contents([initial_pos])[0]
-            cell.set_state("charging_station")
+            self.cells[initial_pos].set_state(CHARGING_STATION)
             # Create roomba without initial position
             roomba = Roomba(self.next_id(), self, None)  
             self.roombas.append(roomba)
             self.schedule.add(roomba)
             self.grid.place_agent(roomba, initial_pos)
             roomba.pos = initial_pos  
-            roomba.home_charger = initial_pos
+            roomba.set_home_charger(initial_pos)
         else:
             # Multiple agents at random positions
             available_positions = [
-                (x, y)
-                for x in range(self.width)
-                for y in range(self.height)
-                if not any(
-                    isinstance(agent, Roomba)
-                    for agent in self.grid.get_cell_list_contents([(x, y)])
-                )
-                and self.grid.get_cell_list_contents([(x, y)])[0].state != "obstacle"
+                tuple(pos)
+                for pos in np.argwhere(
+                    (self.state_grid == CLEAN) | (self.state_grid == DIRTY)
+                ).tolist()
             ]
 
             for _ in range(self.n_agents):
@@ -191,8 +200,7 @@ class RoomModel(Model):
                     available_positions.remove(pos)
 
                     # First set the cell as charging station
-                    cell = self.grid.get_cell_list_contents([pos])[0]
-                    cell.set_state("charging_station")
+                    self.cells[pos].set_state(CHARGING_STATION)
 
                     # Create roomba without initial position
                     roomba = Roomba(
@@ -202,23 +210,41 @@ class RoomModel(Model):
                     self.schedule.add(roomba)
                     self.grid.place_agent(roomba, pos)
                     roomba.pos = pos  
-                    roomba.home_charger = pos
+                    roomba.set_home_charger(pos)
+
+        # Obstacles never move, so each charger's distance field is built once
+        self.dist_to_charger = {
+            roomba.home_charger: distance_field(self.state_grid, *roomba.home_charger)
+            for roomba in self.roombas
+        }
+
+    def get_open_neighbours(self, pos):
+        """
+        Positions next to pos that aren't obstacles, in DIRS order.
+        Obstacles never change after init_grid, so each result is cached.
+        """
+        neighbours = self._open_neighbours.get(pos)
+        if neighbours is None:
+            x, y = pos
+            neighbours = tuple(
+                (x + dx, y + dy)
+                for dx, dy in DIRS
+                if 0 <= x + dx < self.width
+                and 0 <= y + dy < self.height
+                and self.state_grid[x + dx, y + dy] != OBSTACLE
+            )
+            self._open_neighbours[pos] = neighbours
+        return neighbours
 
     def get_metrics(self):
         """Return current metrics of the simulation"""
-        total_cells = self.width * self.height
-        clean_cells = sum(
-            1
-            for x in range(self.width)
-            for y in range(self.height)
-            if self.grid.get_cell_list_contents([(x, y)])[0].state == "clean"
-        )
+        clean_cells = self.state_counts[CLEAN]
 
         total_movements = sum(roomba.movements for roomba in self.roombas)
 
         return {
             "time_steps": self.current_time,
-            "clean_percentage": (clean_cells / total_cells) * 100,
+            "clean_percentage": (clean_cells / self.total_cells) * 100,
             "total_movements": total_movements,
             "movements_per_agent": [roomba.movements for roomba in self.roombas],
         }
@@ -1,8 +1,123 @@
 from src.model.room import RoomModel
-from mesa.datacollection import DataCollector
+from src.model.metrics import compute_metrics
+from src.agents.cell import CLEAN
+from src.agents.roomba_kernels import nearest_marked
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import multiprocessing
+import os
+import random
+
+# Final metric of each simulation -> name used in the analysis keys
+METRIC_KEYS = {
+    "time_steps": "time_steps",
+    "clean_percentage": "clean_percentage",
+    "total_movements": "movements",
+    "average_battery": "battery",
+    "explored_percentage": "explored",
+    "cleaned_percentage": "cleaned",
+    "cleaning_efficiency": "cleaning_efficiency",
+    "battery_efficiency": "battery_efficiency",
+}
+
+
+# Per-step series recorded for each simulation
+TIME_SERIES_KEYS = (
+    "Clean_Percentage",
+    "Total_Movements",
+    "Average_Battery",
+    "Explored_Cells_Percentage",
+    "Cleaned_Cells_Percentage",
+    "Cleaning_Efficiency",
+    "Battery_Efficiency",
+)
+
+
+def _step_metrics(model):
+    """Current metrics of model, in TIME_SERIES_KEYS order"""
+    roombas = model.roombas
+    n = len(roombas)
+    return compute_metrics(
+        model.state_counts[CLEAN],
+        model.clean_cells_count,
+        np.fromiter((roomba.battery for roomba in roombas), np.int16, n),
+        np.fromiter((roomba.movements for roomba in roombas), np.int32, n),
+        np.fromiter((roomba.explored_count for roomba in roombas), np.int32, n),
+        model.total_cells,
+    )
+
+
+def _run_one(params):
+    """Run a single simulation and return its final metrics"""
+    max_time = params["max_time"]
+
+    # Initialize model
+    model = RoomModel(**params)
+
+    # Store time series data, preallocated for the longest possible run
+    time_series = {
+        key: np.empty(max_time, dtype=np.float32) for key in TIME_SERIES_KEYS
+    }
+    t = 0
+
+    # Run simulation
+    while model.current_time < max_time and model.running:
+        model.step()
+
+        # Collect data at each step
+        (
+            clean_percentage,
+            total_movements,
+            avg_battery,
+            explored_percentage,
+            cleaned_percentage,
+            cleaning_efficiency,
+            battery_efficiency,
+        ) = _step_metrics(model)
+
+        # Store in time series
+        time_series["Clean_Percentage"][t] = clean_percentage
+        time_series["Total_Movements"][t] = total_movements
+        time_series["Average_Battery"][t] = avg_battery
+        time_series["Explored_Cells_Percentage"][t] = explored_percentage
+        time_series["Cleaned_Cells_Percentage"][t] = cleaned_percentage
+        time_series["Cleaning_Efficiency"][t] = cleaning_efficiency
+        time_series["Battery_Efficiency"][t] = battery_efficiency
+        t += 1
+
+    # Trim to the steps actually run
+    time_series = {key: values[:t] for key, values in time_series.items()}
+
+    # Calculate final metrics
+    return {
+        "time_steps": model.current_time,
+        "clean_percentage": clean_percentage,
+        "total_movements": total_movements,
+        "average_battery": avg_battery,
+        "explored_percentage": explored_percentage,
+        "cleaned_percentage": cleaned_percentage,
+        "cleaning_efficiency": cleaning_efficiency,
+        "battery_efficiency": battery_efficiency,
+        "seed": params.get("seed"),
+        "time_series": time_series
+    }
+
+
+def _warm_up():
+    """
+    Call every Numba kernel once on a small seeded model. The kernels are
+    built with cache=True, so this compiles them (or loads them) into the
+    on-disk cache once, and workers load them from there whether they are
+    forked or spawned.
+    """
+    model = RoomModel(width=5, height=5, n_agents=1, max_time=1, seed=0)
+    roomba = model.roombas[0]
+    # distance_field has already run while building the model
+    roomba.update_knowledge()
+    nearest_marked(roomba.dirty_cells_memory, *roomba.pos)
+    roomba.find_path_to_target((0, 0))
+    _step_metrics(model)
 
 
 def run_simulation_batch(
@@ -13,125 +128,85 @@ def run_simulation_batch(
     obstacle_percent=0.2,
     max_time=1000,
     n_simulations=5,
+    seed=None,
+    processes=None,
 ):
-    """Run multiple simulations with the same parameters and collect detailed statistics"""
-    detailed_results = []
-    
-    print(f"\nRunning {n_simulations} simulations with {n_agents} agent(s):")
-    print("=" * 50)
-    
-    for i in range(n_simulations):
-        print(f"\nSimulation {i+1}:")
-        print("-" * 30)
-        
-        # Initialize model
-        model = RoomModel(
-            width=width,
-            height=height,
-            n_agents=n_agents,
-            dirty_percent=dirty_percent,
-            obstacle_percent=obstacle_percent,
-            max_time=max_time,
-        )
-        
-        # Store time series data
-        time_series = {
-            "Clean_Percentage": [],
-            "Total_Movements": [],
-            "Average_Battery": [],
-            "Explored_Cells_Percentage": [],
-            "Cleaned_Cells_Percentage": [],
-            "Cleaning_Efficiency": [],
-            "Battery_Efficiency": [],
-        }
-        
-        # Run simulation
-        while model.current_time < max_time and model.running:
-            model.step()
-            
-            # Collect data at each step
-            clean_percentage = sum(
-                1 for x in range(model.width) for y in range(model.height)
-                if model.grid.get_cell_list_contents([(x, y)])[0].state == "clean"
-            ) / (model.width * model.height) * 100
-            
-            total_movements = sum(roomba.movements for roomba in model.roombas)
-            avg_battery = sum(roomba.battery for roomba in model.roombas) / len(model.roombas)
-            explored_cells = sum(len(roomba.explored_cells) for roomba in model.roombas)
-            explored_percentage = (explored_cells / (model.width * model.height)) * 100
-            cleaned_percentage = (model.clean_cells_count / (model.width * model.height)) * 100
-            
-            # Calculate efficiencies
-            cleaning_efficiency = (model.clean_cells_count / max(total_movements, 1)) * 100
-            battery_used = sum(100 - roomba.battery for roomba in model.roombas)
-            battery_efficiency = (model.clean_cells_count / max(battery_used, 1)) * 100
-            
-            # Store in time series
-            time_series["Clean_Percentage"].append(clean_percentage)
-            time_series["Total_Movements"].append(total_movements)
-            time_series["Average_Battery"].append(avg_battery)
-            time_series["Explored_Cells_Percentage"].append(explored_percentage)
-            time_series["Cleaned_Cells_Percentage"].append(cleaned_percentage)
-            time_series["Cleaning_Efficiency"].append(cleaning_efficiency)
-            time_series["Battery_Efficiency"].append(battery_efficiency)
-        
-        # Calculate final metrics
-        final_metrics = {
-            "time_steps": model.current_time,
-            "clean_percentage": clean_percentage,
-            "total_movements": total_movements,
-            "average_battery": avg_battery,
-            "explored_percentage": explored_percentage,
-            "cleaned_percentage": cleaned_percentage,
-            "cleaning_efficiency": cleaning_efficiency,
-            "battery_efficiency": battery_efficiency,
-            "time_series": time_series
-        }
-        
-        detailed_results.append(final_metrics)
-        
-        # Print detailed results for this simulation
-        print(f"Time steps: {final_metrics['time_steps']}")
-        print(f"Final clean percentage: {final_metrics['clean_percentage']:.2f}%")
-        print(f"Total movements: {final_metrics['total_movements']}")
-        print(f"Final average battery: {final_metrics['average_battery']:.2f}%")
-        print(f"Explored area: {final_metrics['explored_percentage']:.2f}%")
-        print(f"Cleaned area: {final_metrics['cleaned_percentage']:.2f}%")
-        print(f"Cleaning efficiency: {final_metrics['cleaning_efficiency']:.2f}%")
-        print(f"Battery efficiency: {final_metrics['battery_efficiency']:.2f}%")
-        
+    """
+    Run multiple simulations with the same parameters and collect detailed statistics.
+    processes caps the worker pool, which defaults to one worker per CPU.
+    """
+    # Simulation i is seeded with seed + i, so a batch can be reproduced
+    if seed is None:
+        seed = random.randrange(2**32)
+
+    params = {
+        "width": width,
+        "height": height,
+        "n_agents": n_agents,
+        "dirty_percent": dirty_percent,
+        "obstacle_percent": obstacle_percent,
+        "max_time": max_time,
+    }
+
+    # Compile once here rather than in every worker process
+    _warm_up()
+
+    # Simulations are independent, so run them in separate processes
+    processes = min(n_simulations, processes or os.cpu_count() or 1)
+    param_list = [{**params, "seed": seed + i} for i in range(n_simulations)]
+    with multiprocessing.Pool(processes=processes) as pool:
+        detailed_results = list(pool.imap_unordered(_run_one, param_list))
+    detailed_results.sort(key=lambda r: r["seed"])
+
+    # Report the whole batch in a single write, so batches running side by
+    # side don't interleave their output
+    report = [
+        f"\nRunning {n_simulations} simulations with {n_agents} agent(s):",
+        "=" * 50,
+    ]
+    for i, final_metrics in enumerate(detailed_results):
+        report += [
+            f"\nSimulation {i+1}:",
+            "-" * 30,
+            f"Time steps: {final_metrics['time_steps']}",
+            f"Final clean percentage: {final_metrics['clean_percentage']:.2f}%",
+            f"Total movements: {final_metrics['total_movements']}",
+            f"Final average battery: {final_metrics['average_battery']:.2f}%",
+            f"Explored area: {final_metrics['explored_percentage']:.2f}%",
+            f"Cleaned area: {final_metrics['cleaned_percentage']:.2f}%",
+            f"Cleaning efficiency: {final_metrics['cleaning_efficiency']:.2f}%",
+            f"Battery efficiency: {final_metrics['battery_efficiency']:.2f}%",
+        ]
+    print("\n".join(report))
+
     return detailed_results
 
 def analyze_results(results):
     """Analyze the results of multiple simulations with detailed statistics"""
-    analysis = {
-        "average_time_steps": sum(r["time_steps"] for r in results) / len(results),
-        "average_clean_percentage": sum(r["clean_percentage"] for r in results) / len(results),
-        "average_movements": sum(r["total_movements"] for r in results) / len(results),
-        "average_battery": sum(r["average_battery"] for r in results) / len(results),
-        "average_explored": sum(r["explored_percentage"] for r in results) / len(results),
-        "average_cleaned": sum(r["cleaned_percentage"] for r in results) / len(results),
-        "average_cleaning_efficiency": sum(r["cleaning_efficiency"] for r in results) / len(results),
-        "average_battery_efficiency": sum(r["battery_efficiency"] for r in results) / len(results),
-        "number_of_simulations": len(results),
-    }
-    
-    # Calculate standard deviations
-    analysis["std_time_steps"] = np.std([r["time_steps"] for r in results])
-    analysis["std_clean_percentage"] = np.std([r["clean_percentage"] for r in results])
-    analysis["std_movements"] = np.std([r["total_movements"] for r in results])
-    analysis["std_battery"] = np.std([r["average_battery"] for r in results])
-    analysis["std_explored"] = np.std([r["explored_percentage"] for r in results])
-    analysis["std_cleaned"] = np.std([r["cleaned_percentage"] for r in results])
-    analysis["std_cleaning_efficiency"] = np.std([r["cleaning_efficiency"] for r in results])
-    analysis["std_battery_efficiency"] = np.std([r["battery_efficiency"] for r in results])
-    
+    df = pd.DataFrame(results, columns=list(METRIC_KEYS))
+    means = df.mean()
+    # Population standard deviation, as np.std computes it
+    stds = df.std(ddof=0)
+
+    analysis = {f"average_{name}": means[key] for key, name in METRIC_KEYS.items()}
+    analysis["number_of_simulations"] = len(results)
+    analysis.update({f"std_{name}": stds[key] for key, name in METRIC_KEYS.items()})
     return analysis
 
-def plot_results(single_results, multi_results):
-    """Create comprehensive comparative plots of the simulation results"""
-    fig, axes = plt.subplots(2, 4, figsize=(20, 10))
-    fig.suptitle('Single Agent vs Multiple Agents Performance Comparison')
+def plot_results(single_results, multi_results, fig=None):
+    """
+    Create comprehensive comparative plots of the simulation results.
+    The figure is kept between calls and redrawn in place while it's open,
+    or pass fig to draw into a 2x4 figure of your own.
+    """
+    if fig is None:
+        fig = getattr(plot_results, "_fig", None)
+        if fig is None or not plt.fignum_exists(fig.number):
+            fig, _ = plt.subplots(2, 4, figsize=(20, 10))
+            plot_results._fig = fig
+    axes = np.asarray(fig.axes).reshape(2, 4)
+    for ax in axes.flat:
+        ax.cla()
     
     # Prepare data for all metrics
     metrics = [
@@ -144,18 +219,28 @@ def plot_results(single_results, multi_results):
         ("cleaning_efficiency", "Cleaning Efficiency (%)"),
         ("battery_efficiency", "Battery Efficiency (%)")
     ]
-    
-    for idx, (metric, title) in enumerate(metrics):
-        ax = axes[idx // 4, idx % 4]
-        single_data = [r[metric] for r in single_results]
-        multi_data = [r[metric] for r in multi_results]
-        
-        ax.boxplot([single_data, multi_data], labels=["Single Agent", "Multiple Agents"])
+    columns = [metric for metric, _ in metrics]
+
+    # One row per simulation, grouped in a fixed single/multi order
+    df = pd.DataFrame(single_results + multi_results, columns=columns)
+    df["group"] = pd.Categorical(
+        ["Single Agent"] * len(single_results)
+        + ["Multiple Agents"] * len(multi_results),
+        categories=["Single Agent", "Multiple Agents"],
+    )
+    df.boxplot(
+        column=columns, by="group", ax=axes.flatten(), sharex=False, sharey=False
+    )
+
+    for ax, (_, title) in zip(axes.flat, metrics):
         ax.set_title(title)
+        ax.set_xlabel("")
         ax.set_ylabel("Value")
         ax.grid(True)
+    fig.suptitle('Single Agent vs Multiple Agents Performance Comparison')
     
-    plt.tight_layout()
+    fig.tight_layout()
+    fig.canvas.draw_idle()
     plt.show()
 
 if __name__ == "__main__":
@@ -0,0 +1,33 @@
+import numpy as np
+
+from src.agents.cell import CLEAN, DIRTY, OBSTACLE
+
+# Fixed grids, one string per x column: "." clean, "d" dirty, "#" obstacle
+GRIDS = {
+    "border_obstacles": [
+        "#.#..",
+        "..d#.",
+        "#.#..",
+        "..#.#",
+        ".#d..",
+    ],
+    "walled_off_corner": [
+        "..#..",
+        "..#d.",
+        "###..",
+        ".....",
+        "d....",
+    ],
+    "non_square": [
+        "..#...",
+        ".d#.#.",
+        "....#.",
+    ],
+}
+
+SYMBOLS = {".": CLEAN, "d": DIRTY, "#": OBSTACLE}
+
+
+def make_grid(columns):
+    """State grid for one of GRIDS, indexed by (x, y)"""
+    return np.array([[SYMBOLS[c] for c in column] for column in columns], dtype=np.int8)
@@ -0,0 +1,70 @@
+from collections import deque
+
+import pytest
+
+from src.agents.astar_numba import DX, DY, UNREACHABLE, astar_next, distance_field
+from src.agents.cell import OBSTACLE
+from src.tests.conftest import GRIDS, make_grid
+
+
+def bfs_distances(state_grid, gx, gy):
+    """Plain Python BFS path lengths to (gx, gy), keyed by each reachable cell"""
+    w, h = state_grid.shape
+    dist = {(gx, gy): 0}
+    queue = deque([(gx, gy)])
+    while queue:
+        x, y = queue.popleft()
+        for dx, dy in zip(DX, DY):
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < w and 0 <= ny < h) or (nx, ny) in dist:
+                continue
+            if state_grid[nx, ny] == OBSTACLE:
+                continue
+            dist[(nx, ny)] = dist[(x, y)] + 1
+            queue.append((nx, ny))
+    return dist
+
+
+def open_cells(state_grid):
+    w, h = state_grid.shape
+    return [
+        (x, y) for x in range(w) for y in range(h) if state_grid[x, y] != OBSTACLE
+    ]
+
+
+@pytest.mark.parametrize("name", GRIDS)
+def test_distance_field_matches_bfs(name):
+    state_grid = make_grid(GRIDS[name])
+    for gx, gy in open_cells(state_grid):
+        expected = bfs_distances(state_grid, gx, gy)
+        field = distance_field(state_grid, gx, gy)
+        w, h = state_grid.shape
+        for x in range(w):
+            for y in range(h):
+                assert field[x, y] == expected.get((x, y), UNREACHABLE)
+
+
+@pytest.mark.parametrize("name", GRIDS)
+def test_astar_next_matches_bfs(name):
+    state_grid = make_grid(GRIDS[name])
+    cells = open_cells(state_grid)
+    for gx, gy in cells:
+        expected = bfs_distances(state_grid, gx, gy)
+        for sx, sy in cells:
+            next_x, next_y, length = astar_next(state_grid, sx, sy, gx, gy)
+            if (sx, sy) not in expected:
+                assert (next_x, next_y, length) == (-1, -1, -1)
+            elif (sx, sy) == (gx, gy):
+                assert (next_x, next_y, length) == (sx, sy, 0)
+            else:
+                assert length == expected[(sx, sy)]
+                # The first step is a neighbour one step closer to the goal
+                assert abs(next_x - sx) + abs(next_y - sy) == 1
+                assert expected[(next_x, next_y)] == length - 1
+
+
+def test_astar_next_unreachable_goal():
+    state_grid = make_grid(GRIDS["walled_off_corner"])
+    assert astar_next(state_grid, 4, 4, 0, 0) == (-1, -1, -1)
+    # Goal on an obstacle
+    assert astar_next(state_grid, 4, 4, 2, 2) == (-1, -1, -1)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from src.agents.cell import CLEAN, DIRTY, OBSTACLE, CHARGING_STATION
+from src.model.room import RoomModel
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_single_agent_grid_counts(seed):
+    model = RoomModel(width=7, height=5, n_agents=1, seed=seed)
+    # (1, 1) is reserved for the charger, so placement draws from the rest
+    placeable = 7 * 5 - 1
+    dirty = int(placeable * 0.3)
+    obstacles = int(placeable * 0.2)
+
+    assert model.state_grid[1, 1] == CHARGING_STATION
+    assert model.state_counts == [placeable - dirty - obstacles, dirty, obstacles, 1]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_charger_index_is_skipped_when_every_cell_is_filled(seed):
+    # Dirt and obstacles cover every cell but the charger, so the shifted
+    # sample has to reach the last index and never land on (1, 1)
+    model = RoomModel(
+        width=5, height=5, dirty_percent=0.5, obstacle_percent=0.5, n_agents=1, seed=seed
+    )
+
+    assert model.state_grid[1, 1] == CHARGING_STATION
+    assert model.state_counts == [0, 12, 12, 1]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_multi_agent_chargers(seed):
+    model = RoomModel(width=10, height=10, n_agents=3, seed=seed)
+
+    assert model.state_counts[CHARGING_STATION] == 3
+    assert model.state_counts[OBSTACLE] == 20
+    for roomba in model.roombas:
+        assert roomba.pos == roomba.home_charger
+        assert model.state_grid[roomba.pos] == CHARGING_STATION
+
+
+@pytest.mark.parametrize("n_agents", [1, 3])
+def test_state_counts_follow_state_grid(n_agents):
+    model = RoomModel(width=10, height=10, n_agents=n_agents, max_time=300, seed=3)
+    while model.running:
+        model.step()
+
+    # Some dirt has been cleaned, and the counts followed every change
+    assert model.state_counts[DIRTY] < int(model.total_cells * 0.3)
+    assert np.bincount(model.state_grid.ravel(), minlength=4).tolist() == model.state_counts
+    for x in range(model.width):
+        for y in range(model.height):
+            assert model.cells[x, y].state == model.state_grid[x, y]
+    for roomba in model.roombas:
+        assert roomba.explored_count == np.count_nonzero(roomba.explored_cells)
+
+
+def test_same_seed_gives_same_room():
+    first = RoomModel(n_agents=3, seed=11)
+    second = RoomModel(n_agents=3, seed=11)
+
+    np.testing.assert_array_equal(first.state_grid, second.state_grid)
+    assert [r.pos for r in first.roombas] == [r.pos for r in second.roombas]
+    assert first.state_counts[CLEAN] == second.state_counts[CLEAN]
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from src.agents.astar_numba import DX, DY
+from src.agents.cell import DIRTY
+from src.agents.roomba import STATE_KNOWLEDGE, CellKnowledge
+from src.agents.roomba_kernels import nearest_marked, observe
+from src.tests.conftest import GRIDS, make_grid
+
+
+def observe_reference(state_grid, x, y):
+    """Plain Python version of observe on fresh arrays"""
+    w, h = state_grid.shape
+    knowledge = np.full((w, h), CellKnowledge.UNKNOWN.value, dtype=np.int8)
+    dirty_memory = np.zeros((w, h), dtype=np.uint8)
+    visited = np.zeros_like(dirty_memory)
+    explored = np.zeros_like(dirty_memory)
+
+    knowledge[x, y] = STATE_KNOWLEDGE[state_grid[x, y]]
+    dirty_memory[x, y] = state_grid[x, y] == DIRTY
+    visited[x, y] = 1
+    for dx, dy in zip(DX, DY):
+        nx, ny = x + dx, y + dy
+        if 0 <= nx < w and 0 <= ny < h:
+            explored[nx, ny] = 1
+            knowledge[nx, ny] = STATE_KNOWLEDGE[state_grid[nx, ny]]
+            if state_grid[nx, ny] == DIRTY:
+                dirty_memory[nx, ny] = 1
+    return knowledge, dirty_memory, visited, explored
+
+
+def nearest_reference(mask, x, y):
+    """Plain Python scan for the first closest marked cell, or (-1, -1)"""
+    w, h = mask.shape
+    marked = [(i, j) for i in range(w) for j in range(h) if mask[i, j]]
+    if not marked:
+        return -1, -1
+    return min(marked, key=lambda pos: abs(pos[0] - x) + abs(pos[1] - y))
+
+
+@pytest.mark.parametrize("name", GRIDS)
+def test_observe_matches_reference(name):
+    state_grid = make_grid(GRIDS[name])
+    w, h = state_grid.shape
+    for x in range(w):
+        for y in range(h):
+            knowledge = np.full((w, h), CellKnowledge.UNKNOWN.value, dtype=np.int8)
+            dirty_memory = np.zeros((w, h), dtype=np.uint8)
+            visited = np.zeros_like(dirty_memory)
+            explored = np.zeros_like(dirty_memory)
+
+            newly_explored = observe(
+                state_grid, STATE_KNOWLEDGE, knowledge, dirty_memory,
+                visited, explored, x, y,
+            )
+
+            expected = observe_reference(state_grid, x, y)
+            for actual, wanted in zip(
+                (knowledge, dirty_memory, visited, explored), expected
+            ):
+                np.testing.assert_array_equal(actual, wanted)
+            assert newly_explored == np.count_nonzero(expected[3])
+
+            # Observing again from the same cell explores nothing new
+            assert observe(
+                state_grid, STATE_KNOWLEDGE, knowledge, dirty_memory,
+                visited, explored, x, y,
+            ) == 0
+
+
+def test_observe_clears_cleaned_cell():
+    state_grid = make_grid(GRIDS["border_obstacles"])
+    w, h = state_grid.shape
+    knowledge = np.zeros((w, h), dtype=np.int8)
+    dirty_memory = np.ones((w, h), dtype=np.uint8)
+    visited = np.zeros_like(dirty_memory)
+    explored = np.zeros_like(dirty_memory)
+
+    observe(state_grid, STATE_KNOWLEDGE, knowledge, dirty_memory, visited, explored, 0, 1)
+
+    assert dirty_memory[0, 1] == 0
+
+
+@pytest.mark.parametrize("name", GRIDS)
+def test_nearest_marked_matches_reference(name):
+    state_grid = make_grid(GRIDS[name])
+    w, h = state_grid.shape
+    for mask in (
+        (state_grid == DIRTY).astype(np.uint8),
+        (state_grid != DIRTY).astype(np.uint8),
+        np.zeros((w, h), dtype=np.uint8),
+    ):
+        for x in range(w):
+            for y in range(h):
+                assert nearest_marked(mask, x, y) == nearest_reference(mask, x, y)
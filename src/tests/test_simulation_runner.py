@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from src.simulation_runner import (
+    METRIC_KEYS,
+    _run_one,
+    analyze_results,
+    run_simulation_batch,
+)
+
+BATCH = {
+    "width": 8,
+    "height": 8,
+    "n_agents": 2,
+    "max_time": 40,
+    "n_simulations": 3,
+    "seed": 7,
+    "processes": 2,
+}
+
+
+def final_metrics(result):
+    return {key: result[key] for key in METRIC_KEYS}
+
+
+def test_analyze_results_matches_numpy():
+    results = [
+        {key: float(i * 3 + len(key) % 5) ** 1.5 for key in METRIC_KEYS}
+        for i in range(4)
+    ]
+
+    analysis = analyze_results(results)
+
+    assert analysis["number_of_simulations"] == 4
+    for key, name in METRIC_KEYS.items():
+        values = [r[key] for r in results]
+        assert analysis[f"average_{name}"] == pytest.approx(np.mean(values))
+        # np.std is the population standard deviation
+        assert analysis[f"std_{name}"] == pytest.approx(np.std(values))
+
+
+def test_analyze_results_single_run_has_zero_std():
+    analysis = analyze_results([{key: 2.5 for key in METRIC_KEYS}])
+
+    assert analysis["std_movements"] == 0
+    assert analysis["average_movements"] == 2.5
+
+
+def test_batch_is_reproducible_and_ordered_by_seed():
+    first = run_simulation_batch(**BATCH)
+    second = run_simulation_batch(**BATCH)
+
+    assert [r["seed"] for r in first] == [7, 8, 9]
+    assert [final_metrics(r) for r in first] == [final_metrics(r) for r in second]
+    for a, b in zip(first, second):
+        for key, values in a["time_series"].items():
+            np.testing.assert_array_equal(values, b["time_series"][key])
+
+
+def test_batch_results_match_single_runs():
+    results = run_simulation_batch(**BATCH)
+    params = {
+        key: BATCH[key]
+        for key in ("width", "height", "n_agents", "max_time")
+    }
+
+    for result in results:
+        alone = _run_one({
+            **params,
+            "dirty_percent": 0.3,
+            "obstacle_percent": 0.2,
+            "seed": result["seed"],
+        })
+        assert final_metrics(alone) == final_metrics(result)
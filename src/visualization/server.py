@@ -1,45 +1,49 @@
-from mesa.visualization.modules import CanvasGrid, ChartModule, PieChartModule
+from mesa.visualization.modules import CanvasGrid, ChartModule
 from mesa.visualization.ModularVisualization import ModularServer
 from mesa.visualization.UserParam import Slider
 from src.model.room import RoomModel
 from src.agents.roomba import Roomba
+from src.agents.cell import CLEAN, DIRTY, OBSTACLE, CHARGING_STATION
 import socket
 import sys
 
+# Portrayal skeletons, copied per agent since the grid adds x/y to each one
+_ROOMBA_BASE = {
+    "Shape": "circle",
+    "Filled": "true",
+    "Layer": 1,
+    "Color": "red",
+    "r": 0.8,
+    "text_color": "white",
+}
+_CELL_BASE = {"Shape": "rect", "w": 1, "h": 1, "Filled": "true", "Layer": 0}
+_COLORS = {
+    CLEAN: "white",
+    DIRTY: "brown",
+    OBSTACLE: "gray",
+    CHARGING_STATION: "yellow",
+}
+
 def agent_portrayal(agent):
     """Single portrayal function to handle both Cell and Roomba agents"""
     if agent is None:
         return
     if isinstance(agent, Roomba):
-        portrayal = {
-            "Shape": "circle",
-            "Filled": "true",
-            "Layer": 1,
-            "Color": "red",
-            "r": 0.8,
-            "text": f"{agent.battery}%",
-            "text_color": "white",
-        }
+        portrayal = _ROOMBA_BASE.copy()
+        portrayal["text"] = f"{agent.battery}%"
     else:  
-        portrayal = {"Shape": "rect", "w": 1, "h": 1, "Filled": "true", "Layer": 0}
-        colors = {
-            "clean": "white",
-            "dirty": "brown",
-            "obstacle": "gray",
-            "charging_station": "yellow",
-        }
-        portrayal["Color"] = colors[agent.state]
+        portrayal = _CELL_BASE.copy()
+        portrayal["Color"] = _COLORS[agent.state]
     return portrayal
 
 def find_free_port():
-    """Find a free port to run the server"""
-    ports_to_try = [8521, 8522, 8523, 8524, 8525]
-    for port in ports_to_try:
+    """Find a free port to run the server, preferring the default 8521"""
+    for port in (8521, 0):
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.bind(("", port))
-            s.close()
-            return port
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                # Port 0 lets the OS pick any free ephemeral port
+                s.bind(("", port))
+                return s.getsockname()[1]
         except OSError:
             continue
     return None